@@ -3,7 +3,7 @@ import pickle
 import zipfile
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
-from main import OpenDSSCircuit
+from api.helpers import wants_full_details, state_summary, parse_json_fields
 
 def create_dashboard_blueprint(circuit_ref, run_and_update_state, test_systems_dir, cache_dir):
     dashboard_bp = Blueprint('dashboard_bp', __name__)
@@ -31,30 +31,34 @@ def create_dashboard_blueprint(circuit_ref, run_and_update_state, test_systems_d
     # API 17: switch test system
     @dashboard_bp.route('/switch_active_system', methods=['POST'])
     def switch_active_system():
-        data = request.get_json()
-        system_name = data['system_name']
+        fields, error = parse_json_fields(system_name=str)
+        if error: return error
+        system_name = fields['system_name']
         master_file_path = os.path.join(test_systems_dir, system_name, 'Master.dss')
         if not os.path.exists(master_file_path):
             return jsonify({"message": f"Master.dss not found for system '{system_name}'."}), 404
         try:
-            circuit_ref['instance'] = OpenDSSCircuit(master_file_path)
+            circuit_ref['instance'].reset(master_file_path)
             current_details = run_and_update_state()
+            if not wants_full_details():
+                current_details = state_summary(current_details)
             return jsonify({"status": "success", "message": f"Switched to {system_name}", "results": current_details}), 200
         except Exception as e:
-            circuit_ref['instance'] = OpenDSSCircuit("") # Revert on failure
+            circuit_ref['instance'].reset("") # Revert on failure
             run_and_update_state()
             return jsonify({"status": "error", "message": str(e)}), 500
 
     # API 19: save cache
     @dashboard_bp.route('/save_cache', methods=['POST'])
     def save_cache_endpoint():
-        data = request.get_json()
-        filename = str(data['filename'])
+        fields, error = parse_json_fields(filename=str)
+        if error: return error
+        filename = fields['filename']
         if not filename.endswith('.cache'): filename += '.cache'
         cache_path = os.path.join(cache_dir, secure_filename(filename))
         try:
             with open(cache_path, 'wb') as f:
-                pickle.dump(circuit_ref['instance'].get_state(), f)
+                pickle.dump(circuit_ref['instance'].get_state(), f, protocol=pickle.HIGHEST_PROTOCOL)
             return jsonify({"status": "success", "message": f"Saved state to '{filename}'."}), 200
         except Exception as e:
             return jsonify({"status": "error", "message": str(e)}), 500
@@ -62,8 +66,9 @@ def create_dashboard_blueprint(circuit_ref, run_and_update_state, test_systems_d
     # API 20: load cache
     @dashboard_bp.route('/load_cache', methods=['POST'])
     def load_cache_endpoint():
-        data = request.get_json()
-        filename = str(data['filename'])
+        fields, error = parse_json_fields(filename=str)
+        if error: return error
+        filename = fields['filename']
         if not filename.endswith('.cache'): filename += '.cache'
         cache_path = os.path.join(cache_dir, secure_filename(filename))
         if not os.path.exists(cache_path):
@@ -73,13 +78,15 @@ def create_dashboard_blueprint(circuit_ref, run_and_update_state, test_systems_d
                 loaded_state = pickle.load(f)
             
             base_dss_file = loaded_state.get("dss_file")
-            circuit_ref['instance'] = OpenDSSCircuit(base_dss_file)
+            circuit_ref['instance'].reset(base_dss_file or "")
             circuit_ref['instance'].set_state(loaded_state)
             
             current_details = run_and_update_state()
+            if not wants_full_details():
+                current_details = state_summary(current_details)
             return jsonify({"status": "success", "message": f"Loaded state from '{filename}'.", "results": current_details}), 200
         except Exception as e:
-            circuit_ref['instance'] = OpenDSSCircuit("") # Revert on failure
+            circuit_ref['instance'].reset("") # Revert on failure
             run_and_update_state()
             return jsonify({"status": "error", "message": str(e)}), 500
 
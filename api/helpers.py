@@ -0,0 +1,81 @@
+import functools
+from flask import jsonify, current_app, request
+
+# Encoded response body for the last state summary served, keyed by the summary object itself
+_encoded_state = {'details': None, 'body': None}
+# State summary keys that carry per-bus data; they are left out when the client passes ?full=0
+_FULL_DETAIL_KEYS = frozenset(('bus_details', 'neighborhood_details'))
+# How each payload field type is described in validation errors
+_TYPE_NAMES = {int: "an integer", float: "a number", str: "a string"}
+# Marks a parse_json_fields field without a default
+_REQUIRED = object()
+
+def mutation_endpoint(run_and_update_state, success_code: int = 200, failure_code: int = 400):
+    """
+    Wraps a view that applies one circuit change and returns the circuit's result dict.
+    On success the simulation and reports are refreshed before responding; otherwise the result is returned as-is.
+    A view may also return a ready response, such as a parse_json_fields error, which is passed through.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            result = view(*args, **kwargs)
+            if not isinstance(result, dict):
+                return result
+            if result.get("status") != "success":
+                return jsonify(result), failure_code
+            run_and_update_state()
+            return jsonify(result), success_code
+        return wrapper
+    return decorator
+
+def state_response(details: dict):
+    """
+    Returns the success response for a state summary. get_current_state_details hands back the same
+    object while the circuit is unchanged, so the encoded body is reused until a new summary arrives.
+    """
+    if _encoded_state['details'] is not details:
+        body = current_app.json.encode({"status": "success", "results": details}, newline=True)
+        _encoded_state.update(details=details, body=body)
+    return current_app.response_class(_encoded_state['body'], mimetype=current_app.json.mimetype), 200
+
+def wants_full_details(default: bool = True) -> bool:
+    """Reads the 'full' query parameter; '0' or 'false' asks for the state summary without per-bus data."""
+    full = request.args.get('full')
+    if full is None:
+        return default
+    return full.lower() not in ('0', 'false', 'no')
+
+def state_summary(details: dict) -> dict:
+    """Returns a state summary without the per-bus data: status, DFP registry, power and voltage aggregates."""
+    return {key: value for key, value in details.items() if key not in _FULL_DETAIL_KEYS}
+
+def parse_json_fields(**fields):
+    """
+    Reads the JSON body and converts each named field with its type, e.g. parse_json_fields(bus_name=str, factor=float).
+    A field given as (type, default) is optional; the default is used when it is absent or null. A type of None
+    passes the value through unconverted, for structured fields the circuit validates itself.
+    Returns (values, None) on success, or (None, error_response) naming the first missing or invalid field
+    so the view can return it directly.
+    """
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return None, (jsonify({"status": "error", "message": "Request body must be a JSON object."}), 400)
+
+    values = {}
+    for name, spec in fields.items():
+        cast, default = spec if isinstance(spec, tuple) else (spec, _REQUIRED)
+        value = data.get(name)
+        if value is None and default is not _REQUIRED:
+            values[name] = default
+            continue
+        if name not in data:
+            return None, (jsonify({"status": "error", "message": f"Missing required parameter '{name}'"}), 400)
+        if cast is None:
+            values[name] = value
+            continue
+        try:
+            values[name] = cast(value)
+        except (ValueError, TypeError):
+            return None, (jsonify({"status": "error", "message": f"The '{name}' parameter must be {_TYPE_NAMES.get(cast, cast.__name__)}."}), 400)
+    return values, None
@@ -1,90 +1,80 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, jsonify
+from api.helpers import mutation_endpoint, parse_json_fields
 
 def create_user_blueprint(circuit_ref, run_and_update_state, log_dfp_activity, results_dir):
     user_bp = Blueprint('user_bp', __name__)
 
     # API 2: add generator
     @user_bp.route('/add_generator', methods=['POST'])
+    @mutation_endpoint(run_and_update_state, success_code=201)
     def add_generator_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].add_generation_to_bus(str(data['bus_name']), float(data['kw']), int(data.get('phases', 1)))
-        if result.get("status") != "success": return jsonify(result), 400
-        run_and_update_state()
-        return jsonify(result), 201
+        fields, error = parse_json_fields(bus_name=str, kw=float, phases=(int, 1))
+        if error: return error
+        return circuit_ref['instance'].add_generation_to_bus(fields['bus_name'], fields['kw'], fields['phases'])
 
     # API 5: add device
     @user_bp.route('/add_device', methods=['POST'])
+    @mutation_endpoint(run_and_update_state, success_code=201)
     def add_device_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].add_device_to_bus(str(data['bus_name']), str(data['device_name']), float(data['kw']), int(data.get('phases', 1)))
-        if result.get("status") != "success": return jsonify(result), 400
-        run_and_update_state()
-        return jsonify(result), 201
+        fields, error = parse_json_fields(bus_name=str, device_name=str, kw=float, phases=(int, 1))
+        if error: return error
+        return circuit_ref['instance'].add_device_to_bus(fields['bus_name'], fields['device_name'], fields['kw'], fields['phases'])
 
     # API 7: subscribe dfp
+    # Subscriptions don't change power flow until a DFP is executed, so these endpoints skip the simulation run;
+    # the state report picks the change up on the next run (e.g. /get_node_data or /execute_dfp)
     @user_bp.route('/subscribe_dfp', methods=['POST'])
     def subscribe_dfp_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].subscribe_dfp(str(data['bus_name']), str(data['dfp_name']))
+        fields, error = parse_json_fields(bus_name=str, dfp_name=str)
+        if error: return error
+        result = circuit_ref['instance'].subscribe_dfp(fields['bus_name'], fields['dfp_name'])
         if result.get("status") != "success": return jsonify(result), 400
-        log_dfp_activity(f"SUBSCRIBED: Bus '{data['bus_name']}' to DFP '{data['dfp_name']}'.", results_dir)
-        run_and_update_state()
+        log_dfp_activity(f"SUBSCRIBED: Bus '{fields['bus_name']}' to DFP '{fields['dfp_name']}'.", results_dir)
         return jsonify(result), 200
 
     # API 10: unsubscribe dfp
     @user_bp.route('/unsubscribe_dfp', methods=['POST'])
     def unsubscribe_dfp_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].unsubscribe_dfp(str(data['bus_name']), str(data['dfp_name']))
+        fields, error = parse_json_fields(bus_name=str, dfp_name=str)
+        if error: return error
+        result = circuit_ref['instance'].unsubscribe_dfp(fields['bus_name'], fields['dfp_name'])
         if result.get("status") != "success": return jsonify(result), 400
-        log_dfp_activity(f"UNSUBSCRIBED: Bus '{data['bus_name']}' from DFP '{data['dfp_name']}'.", results_dir)
-        run_and_update_state()
+        log_dfp_activity(f"UNSUBSCRIBED: Bus '{fields['bus_name']}' from DFP '{fields['dfp_name']}'.", results_dir)
         return jsonify(result), 200
 
     # API 12: modify load device -> RENAMED
     @user_bp.route('/modify_devices_in_node', methods=['POST'])
     def modify_devices_in_bus_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].modify_high_wattage_devices_in_bus(str(data['bus_name']), float(data['power_threshold_kw']), float(data['reduction_factor']))
+        fields, error = parse_json_fields(bus_name=str, power_threshold_kw=float, reduction_factor=float)
+        if error: return error
+        result = circuit_ref['instance'].modify_high_wattage_devices_in_bus(fields['bus_name'], fields['power_threshold_kw'], fields['reduction_factor'])
         run_and_update_state()
-        log_dfp_activity(f"DEVICE_MODIFICATION: on node '{data['bus_name']}'.", results_dir)
+        log_dfp_activity(f"DEVICE_MODIFICATION: on node '{fields['bus_name']}'.", results_dir)
         return jsonify(result), 200
 
     # API 13: disconnect device
     @user_bp.route('/disconnect_device', methods=['POST'])
+    @mutation_endpoint(run_and_update_state, failure_code=404)
     def disconnect_device_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].disconnect_device_from_bus(str(data['bus_name']), str(data['device_name']))
-        if result.get("status") != "success": return jsonify(result), 404
-        run_and_update_state()
-        return jsonify(result), 200
+        fields, error = parse_json_fields(bus_name=str, device_name=str)
+        if error: return error
+        return circuit_ref['instance'].disconnect_device_from_bus(fields['bus_name'], fields['device_name'])
 
     # API 14: add storage
     @user_bp.route('/add_storage_device', methods=['POST'])
+    @mutation_endpoint(run_and_update_state, success_code=201)
     def add_storage_device_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].add_storage_device(data['bus_name'], data['device_name'], data['max_capacity_kwh'], data['charge_rate_kw'], data['discharge_rate_kw'])
-        if result.get("status") != "success": return jsonify(result), 400
-        run_and_update_state()
-        return jsonify(result), 201
+        fields, error = parse_json_fields(bus_name=str, device_name=str, max_capacity_kwh=float, charge_rate_kw=float, discharge_rate_kw=float)
+        if error: return error
+        return circuit_ref['instance'].add_storage_device(fields['bus_name'], fields['device_name'], fields['max_capacity_kwh'], fields['charge_rate_kw'], fields['discharge_rate_kw'])
 
     # API 15: toggle storage
     @user_bp.route('/toggle_storage_device', methods=['POST'])
+    @mutation_endpoint(run_and_update_state)
     def toggle_storage_device_endpoint():
-        data = request.get_json()
-        # --- Start of Change ---
-        # bus_name is now required to uniquely identify the storage device
-        if 'bus_name' not in data or 'device_name' not in data:
-            return jsonify({"status": "error", "message": "Both 'bus_name' and 'device_name' are required."}), 400
-        
-        result = circuit_ref['instance'].toggle_storage_device(
-            str(data['bus_name']), 
-            str(data['device_name']), 
-            str(data.get('action', 'toggle'))
-        )
-        # --- End of Change ---
-        if result.get("status") != "success": return jsonify(result), 400
-        run_and_update_state()
-        return jsonify(result), 200
+        # bus_name is required to uniquely identify the storage device
+        fields, error = parse_json_fields(bus_name=str, device_name=str, action=(str, 'toggle'))
+        if error: return error
+        return circuit_ref['instance'].toggle_storage_device(fields['bus_name'], fields['device_name'], fields['action'])
 
     return user_bp
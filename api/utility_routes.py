@@ -1,4 +1,6 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, jsonify
+from utils import DFP_REGISTRY_FILE
+from api.helpers import mutation_endpoint, state_response, wants_full_details, state_summary, parse_json_fields
 
 def create_utility_blueprint(circuit_ref, run_and_update_state, log_dfp_activity, save_dfp_registry_to_file, results_dir):
     utility_bp = Blueprint('utility_bp', __name__)
@@ -7,21 +9,25 @@ def create_utility_blueprint(circuit_ref, run_and_update_state, log_dfp_activity
     @utility_bp.route('/get_node_data', methods=['GET'])
     def get_node_data_endpoint():
         current_details = run_and_update_state()
-        return jsonify({"status": "success", "results": current_details}), 200
+        if not wants_full_details():
+            return jsonify({"status": "success", "results": state_summary(current_details)}), 200
+        return state_response(current_details)
 
     # Get household details -> RENAMED
     @utility_bp.route('/get_node_details', methods=['POST'])
     def get_bus_details_endpoint():
-        data = request.get_json()
-        bus_details = circuit_ref['instance'].get_single_bus_details(str(data['bus_name']))
+        fields, error = parse_json_fields(bus_name=str)
+        if error: return error
+        bus_details = circuit_ref['instance'].get_single_bus_details(fields['bus_name'])
         if not bus_details:
-            return jsonify({"status": "not_found", "message": f"Node '{data['bus_name']}' not found."}), 404
+            return jsonify({"status": "not_found", "message": f"Node '{fields['bus_name']}' not found."}), 404
         return jsonify({"status": "success", "results": bus_details}), 200
     
     @utility_bp.route('/modify_load_neighbourhood', methods=['POST'])
     def modify_load_neighbourhood_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].modify_loads_in_neighborhood(int(data['neighbourhood']), float(data['factor']))
+        fields, error = parse_json_fields(neighbourhood=int, factor=float)
+        if error: return error
+        result = circuit_ref['instance'].modify_loads_in_neighborhood(fields['neighbourhood'], fields['factor'])
         if result.get("status") == "not_found":
             return jsonify(result), 404
         run_and_update_state()
@@ -30,8 +36,9 @@ def create_utility_blueprint(circuit_ref, run_and_update_state, log_dfp_activity
     # API 4: modify load household -> RENAMED
     @utility_bp.route('/modify_load_node', methods=['POST'])
     def modify_load_household_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].modify_loads_in_houses(str(data['bus_name']), float(data['factor']))
+        fields, error = parse_json_fields(bus_name=str, factor=float)
+        if error: return error
+        result = circuit_ref['instance'].modify_loads_in_houses(fields['bus_name'], fields['factor'])
         if result.get("status") == "success":
             run_and_update_state()
         return jsonify(result), 200
@@ -39,37 +46,32 @@ def create_utility_blueprint(circuit_ref, run_and_update_state, log_dfp_activity
     # API 6: create dfp
     @utility_bp.route('/register_dfp', methods=['POST'])
     def register_dfp_endpoint():
-        data = request.get_json()
-        details = circuit_ref['instance'].register_dfp(data['name'], data['description'], data['min_power_kw'], data['target_pf'])
-        save_dfp_registry_to_file(circuit_ref['instance'], "dfp_registry.txt", results_dir)
-        log_dfp_activity(f"CREATED: DFP '{data['name']}'.", results_dir)
+        fields, error = parse_json_fields(name=str, description=str, min_power_kw=float, target_pf=float)
+        if error: return error
+        details = circuit_ref['instance'].register_dfp(fields['name'], fields['description'], fields['min_power_kw'], fields['target_pf'])
+        save_dfp_registry_to_file(circuit_ref['instance'], DFP_REGISTRY_FILE, results_dir)
+        log_dfp_activity(f"CREATED: DFP '{fields['name']}'.", results_dir)
         return jsonify({"status": "success", "dfp_details": details}), 201
 
     # API 8: modify dfp
     @utility_bp.route('/update_dfp', methods=['PUT'])
     def update_dfp_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].update_dfp(data['name'], data['min_power_kw'], data['target_pf'], data.get('description'))
+        fields, error = parse_json_fields(name=str, min_power_kw=float, target_pf=float, description=(str, None))
+        if error: return error
+        result = circuit_ref['instance'].update_dfp(fields['name'], fields['min_power_kw'], fields['target_pf'], fields['description'])
         if result.get("status") == "success":
-            save_dfp_registry_to_file(circuit_ref['instance'], "dfp_registry.txt", results_dir)
-            log_dfp_activity(f"MODIFIED: DFP '{data['name']}'.", results_dir)
+            save_dfp_registry_to_file(circuit_ref['instance'], DFP_REGISTRY_FILE, results_dir)
+            log_dfp_activity(f"MODIFIED: DFP '{fields['name']}'.", results_dir)
             return jsonify(result), 200
         return jsonify(result), 404
         
     # API 9: execute dfp
     @utility_bp.route('/execute_dfp', methods=['POST'])
     def execute_dfp_endpoint():
-        data = request.get_json()
-        dfp_name = str(data['dfp_name'])
-        # Get the optional 'neighbourhood' parameter, defaulting to None if not present
-        neighbourhood_id = data.get('neighbourhood')
-
-        # Ensure neighbourhood_id is an integer if it exists
-        if neighbourhood_id is not None:
-            try:
-                neighbourhood_id = int(neighbourhood_id)
-            except (ValueError, TypeError):
-                return jsonify({"status": "error", "message": "The 'neighbourhood' parameter must be an integer."}), 400
+        # 'neighbourhood' is optional; without it the DFP runs across all neighbourhoods
+        fields, error = parse_json_fields(dfp_name=str, neighbourhood=(int, None))
+        if error: return error
+        dfp_name, neighbourhood_id = fields['dfp_name'], fields['neighbourhood']
 
         result = circuit_ref['instance'].execute_dfp(dfp_name, neighbourhood_id)
 
@@ -91,44 +93,44 @@ def create_utility_blueprint(circuit_ref, run_and_update_state, log_dfp_activity
     # API 11: delete dfp
     @utility_bp.route('/delete_dfp', methods=['DELETE'])
     def delete_dfp_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].delete_dfp(str(data['name']))
+        fields, error = parse_json_fields(name=str)
+        if error: return error
+        result = circuit_ref['instance'].delete_dfp(fields['name'])
         if result.get("status") == "success":
-            save_dfp_registry_to_file(circuit_ref['instance'], "dfp_registry.txt", results_dir)
-            log_dfp_activity(f"DELETED: DFP '{data['name']}'.", results_dir)
-            run_and_update_state()
+            save_dfp_registry_to_file(circuit_ref['instance'], DFP_REGISTRY_FILE, results_dir)
+            log_dfp_activity(f"DELETED: DFP '{fields['name']}'.", results_dir)
+            # Like register/update, a registry change alone doesn't need a simulation run
             return jsonify(result), 200
         return jsonify(result), 404
 
     # API 18: add new household (already /add_node)
     @utility_bp.route('/add_node', methods=['POST'])
+    @mutation_endpoint(run_and_update_state, success_code=201)
     def add_node_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].add_node(
-            data['bus_name'], data['neighborhood_id'], data['coordinates'], 
-            data['connections'], data['load_kw'], data.get('load_kvar', 0.0)
+        # coordinates and connections are structured values that add_node validates itself
+        fields, error = parse_json_fields(bus_name=str, neighborhood_id=int, coordinates=None, connections=None,
+                                          load_kw=float, load_kvar=(float, 0.0))
+        if error: return error
+        return circuit_ref['instance'].add_node(
+            fields['bus_name'], fields['neighborhood_id'], fields['coordinates'],
+            fields['connections'], fields['load_kw'], fields['load_kvar']
         )
-        if result.get("status") != "success": return jsonify(result), 400
-        run_and_update_state()
-        return jsonify(result), 201
 
     # API 21: modify household (already /modify_node)
     @utility_bp.route('/modify_node', methods=['POST'])
+    @mutation_endpoint(run_and_update_state)
     def modify_node_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].modify_node(data['bus_name'], data.get('load_kw'), data.get('load_kvar'))
-        if result.get("status") != "success": return jsonify(result), 400
-        run_and_update_state()
-        return jsonify(result), 200
+        fields, error = parse_json_fields(bus_name=str, load_kw=(float, None), load_kvar=(float, None))
+        if error: return error
+        return circuit_ref['instance'].modify_node(fields['bus_name'], fields['load_kw'], fields['load_kvar'])
 
     # API 22: delete household (already /delete_node)
     @utility_bp.route('/delete_node', methods=['POST'])
+    @mutation_endpoint(run_and_update_state)
     def delete_node_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].delete_node(data['bus_name'])
-        if result.get("status") != "success": return jsonify(result), 400
-        run_and_update_state()
-        return jsonify(result), 200
+        fields, error = parse_json_fields(bus_name=str)
+        if error: return error
+        return circuit_ref['instance'].delete_node(fields['bus_name'])
 
     # API 23: get dfp details
     @utility_bp.route('/get_dfp_details', methods=['GET'])
@@ -139,8 +141,9 @@ def create_utility_blueprint(circuit_ref, run_and_update_state, log_dfp_activity
     # API 24: send dfp to neighborhood
     @utility_bp.route('/send_dfp_to_neighbourhood', methods=['POST'])
     def send_dfp_to_neighbourhood_endpoint():
-        data = request.get_json()
-        result = circuit_ref['instance'].send_dfp_to_neighbourhood(int(data['neighbourhood']), str(data['dfp_name']))
+        fields, error = parse_json_fields(neighbourhood=int, dfp_name=str)
+        if error: return error
+        result = circuit_ref['instance'].send_dfp_to_neighbourhood(fields['neighbourhood'], fields['dfp_name'])
         if result.get("status") != "success": return jsonify(result), 400
         log_dfp_activity(result.get('message'), results_dir)
         run_and_update_state()
@@ -149,24 +152,11 @@ def create_utility_blueprint(circuit_ref, run_and_update_state, log_dfp_activity
     # API 25: stop dfp
     @utility_bp.route('/stop_dfp', methods=['POST'])
     def stop_dfp_endpoint():
-        data = request.get_json()
-        
-        # Validate required parameter
-        if 'dfp_name' not in data:
-            return jsonify({"status": "error", "message": "Missing required parameter 'dfp_name'"}), 400
-            
-        dfp_name = str(data['dfp_name'])
-        
-        # Get the optional 'neighbourhood' parameter, defaulting to None if not present
-        neighbourhood_id = data.get('neighbourhood')
-        
-        # Ensure neighbourhood_id is an integer if it exists
-        if neighbourhood_id is not None:
-            try:
-                neighbourhood_id = int(neighbourhood_id)
-            except (ValueError, TypeError):
-                return jsonify({"status": "error", "message": "The 'neighbourhood' parameter must be an integer."}), 400
-        
+        # 'neighbourhood' is optional; without it the DFP is stopped everywhere
+        fields, error = parse_json_fields(dfp_name=str, neighbourhood=(int, None))
+        if error: return error
+        dfp_name, neighbourhood_id = fields['dfp_name'], fields['neighbourhood']
+
         try:
             # Call the stop_dfp method
             result = circuit_ref['instance'].stop_dfp(dfp_name, neighbourhood_id)
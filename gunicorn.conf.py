@@ -0,0 +1,10 @@
+# Gunicorn settings, picked up automatically by `gunicorn wsgi:app` when run from the project root.
+bind = "0.0.0.0:5000"
+workers = 1  # one OpenDSS engine per process: scale with threads, not workers (see README)
+worker_class = "gthread"
+threads = 8
+# Don't preload: the report writer and alert threads started when utils.py is imported would stay
+# behind in the master process and never run in the forked worker. With one worker, preloading saves nothing.
+preload_app = False
+# A solve plus report generation can take a while on large feeders
+timeout = 120
@@ -1,4 +1,5 @@
 import opendssdirect as dss
+import numpy as np
 import pandas as pd
 import time
 import random
@@ -18,19 +19,27 @@ class OpenDSSCircuit:
     """
 
     def __init__(self, dss_file: str):
+        self.dss_file = self._resolve_dss_file(dss_file)
+        self.transformer_data = TRANSFORMER_DATA
+        self.neighborhood_data = NEIGHBORHOOD_DATA
+        self._state_version = 0 # Bumped by every method that changes the circuit, used to memoize reports
+        self._reset_tracking_state()
+        self._index_neighborhoods()
+        self._initialize_dss()
+
+    @staticmethod
+    def _resolve_dss_file(dss_file: str) -> str:
+        """Returns the absolute path of the DSS file, falling back to the bundled IEEE 123-bus system."""
         if dss_file:
             # Only convert to absolute path if not already absolute
             if not os.path.isabs(dss_file):
-                self.dss_file = os.path.abspath(dss_file)
-            else:
-                self.dss_file = dss_file
-        else:
-            default_dss_path = os.path.join("Test_Systems", "IEEE_123_Bus-G", "Master.DSS")
-            self.dss_file = os.path.abspath(default_dss_path)
-
+                return os.path.abspath(dss_file)
+            return dss_file
+        default_dss_path = os.path.join("Test_Systems", "IEEE_123_Bus-G", "Master.DSS")
+        return os.path.abspath(default_dss_path)
 
-        self.transformer_data = TRANSFORMER_DATA
-        self.neighborhood_data = NEIGHBORHOOD_DATA
+    def _reset_tracking_state(self):
+        """Clears every record of dynamic changes made to the circuit."""
         self.devices = {}
         self.storage_devices = {}
         self.last_simulation_time = time.time()
@@ -45,6 +54,26 @@ class OpenDSSCircuit:
         self.dfp_acceptance_status = {} # Tracks last acceptance status for (bus, dfp_name)
         self.bus_coords = {}
         self.dynamic_commands = []
+        self._last_flow_cache = None # Power flow summary for the current solution, filled on first read
+        self._line_buses = {} # Maps line name -> (bus1, bus2) for enabled lines
+        self._bus_name_set = None # Lower-case bus names known to OpenDSS, rebuilt after topology changes
+        self._neighborhood_buses = {} # Lower-case bus names per neighborhood, in definition order
+        self._neighborhood_sets = {} # Same as above as frozensets, for membership tests
+        self._bus_neighborhood = {} # Lower-case bus name -> first neighborhood that lists it
+        self._bus_columns_cache = None # (state version, per-bus columns) from the last collection
+        self._last_solve = None # (state version, max_iterations, management result) of the last solve
+
+    def reset(self, dss_file: str = None):
+        """
+        Recompiles the circuit in place and discards all dynamic changes, keeping this object
+        (and anything holding a reference to it) valid. Pass a DSS file to switch systems,
+        or "" for the default system; by default the current file is recompiled.
+        """
+        if dss_file is not None:
+            self.dss_file = self._resolve_dss_file(dss_file)
+        self._state_version += 1
+        self._reset_tracking_state()
+        self._index_neighborhoods()
         self._initialize_dss()
 
     def _initialize_dss(self):
@@ -52,11 +81,50 @@ class OpenDSSCircuit:
         print("Initializing and compiling base circuit...")
         dss.Basic.ClearAll()
         dss.Text.Command(f'Compile "{self.dss_file}"')
+        self._last_flow_cache = None
         if dss.Circuit.NumBuses() == 0:
             raise FileNotFoundError(f"No buses found. Check DSS file: {self.dss_file}")
 
+        self._map_line_buses()
         self._inventory_capacities_and_map_loads()
         self._add_neighborhood_transformers_and_rewire_loads()
+        self._bus_name_set = None
+
+        # Regulators and the solution mode are configured once here rather than before every solve.
+        # Re-issuing "Set Mode=Snap" resets the solver, so leaving it set lets each solve start
+        # from the previous solution instead of a flat start.
+        self._disable_regulators()
+        dss.Text.Command("Set Mode=Snap")
+
+    def _index_neighborhoods(self):
+        """Normalizes the neighborhood bus lists once so lookups don't lower-case them on every call."""
+        self._neighborhood_buses = {}
+        self._neighborhood_sets = {}
+        self._bus_neighborhood = {}
+        for nid, buses in self.neighborhood_data.items():
+            lowered = tuple(b.lower() for b in buses)
+            self._neighborhood_buses[nid] = lowered
+            self._neighborhood_sets[nid] = frozenset(lowered)
+            for bus in lowered:
+                self._bus_neighborhood.setdefault(bus, nid)
+
+    def _get_bus_name_set(self) -> frozenset:
+        """Returns the lower-case names of all buses in the circuit, cached until the topology changes."""
+        if self._bus_name_set is None:
+            self._bus_name_set = frozenset(b.lower() for b in dss.Circuit.AllBusNames())
+        return self._bus_name_set
+
+    def _map_line_buses(self):
+        """Records the terminal buses of every line so topology lookups don't need to query OpenDSS."""
+        self._line_buses = {}
+        if dss.Lines.Count() == 0: return
+
+        dss.Lines.First()
+        while True:
+            bus1 = dss.Lines.Bus1().split('.')[0].lower()
+            bus2 = dss.Lines.Bus2().split('.')[0].lower()
+            self._line_buses[dss.Lines.Name().lower()] = (bus1, bus2)
+            if not dss.Lines.Next() > 0: break
 
 
     def _inventory_capacities_and_map_loads(self):
@@ -168,9 +236,9 @@ class OpenDSSCircuit:
             primary_bus = primary_bus_name.lower()
             secondary_bus = f"{primary_bus}_sec"
 
-            buses_in_neighborhood = [b.lower() for b in self.neighborhood_data.get(neighborhood_id, [])]
+            buses_in_neighborhood = self._neighborhood_sets.get(neighborhood_id, frozenset())
 
-            if primary_bus not in [b.lower() for b in dss.Circuit.AllBusNames()]:
+            if primary_bus not in self._get_bus_name_set():
                 continue
 
             dss.Circuit.SetActiveBus(primary_bus)
@@ -197,6 +265,7 @@ class OpenDSSCircuit:
         """
         Adds a new physical node (bus) to the simulation, connecting it to existing buses with new lines.
         """
+        self._state_version += 1
         new_bus_name_lower = new_bus_name.lower()
 
         # --- Validation ---
@@ -206,6 +275,9 @@ class OpenDSSCircuit:
             return {"status": "error", "message": f"Neighborhood ID '{neighborhood_id}' not found."}
         if not connections:
             return {"status": "error", "message": "At least one connection to an existing bus is required."}
+        bus_coordinates = self._normalize_coordinates(coordinates)
+        if bus_coordinates is None:
+            return {"status": "error", "message": "Coordinates must be {\"X\": x, \"Y\": y} or [x, y] with numeric values."}
 
         # --- Get all available linecodes for robust validation ---
         dss.LineCodes.First()
@@ -242,6 +314,7 @@ class OpenDSSCircuit:
                 cmd = f"New Line.{line_name} Bus1={new_bus_name_lower} Bus2={to_bus} LineCode={linecode} Length={length} Phases={line_phases}"
                 dss.Text.Command(cmd)
                 self.dynamic_commands.append(cmd)
+                self._line_buses[line_name.lower()] = (new_bus_name_lower, to_bus)
 
             except KeyError as e:
                 return {"status": "error", "message": f"Missing required connection parameter: {e}"}
@@ -269,8 +342,10 @@ class OpenDSSCircuit:
 
 
         # --- Update Internal Tracking Data Structures ---
+        self._bus_name_set = None
         self.neighborhood_data[neighborhood_id].append(new_bus_name_lower)
-        self.bus_coords[new_bus_name_lower] = coordinates
+        self._index_neighborhoods()
+        self.bus_coords[new_bus_name_lower] = bus_coordinates
         self.bus_capacities[new_bus_name_lower] = {'load_kw': load_kw, 'gen_kw': 0}
         self.load_original_bus_map[new_load_name.lower()] = new_bus_name_lower
         self.original_load_kws[new_load_name.lower()] = load_kw
@@ -280,10 +355,22 @@ class OpenDSSCircuit:
         return {"status": "success", "message": message}
 
 
+    @staticmethod
+    def _normalize_coordinates(coordinates) -> dict:
+        """Converts {'X': x, 'Y': y} or [x, y] to the {'X', 'Y'} float dict kept in bus_coords; None if invalid."""
+        try:
+            if isinstance(coordinates, dict):
+                return {'X': float(coordinates['X']), 'Y': float(coordinates['Y'])}
+            x, y = coordinates
+            return {'X': float(x), 'Y': float(y)}
+        except (KeyError, TypeError, ValueError):
+            return None
+
     def modify_node(self, bus_name: str, load_kw: float = None, load_kvar: float = None) -> dict:
         """
         Modifies the parameters of a dynamically added node, specifically its load.
         """
+        self._state_version += 1
         bus_name_lower = bus_name.lower()
         load_name = f"load_{bus_name_lower}"
 
@@ -333,6 +420,7 @@ class OpenDSSCircuit:
         """
         Deletes a dynamically added node and its connections from the simulation.
         """
+        self._state_version += 1
         bus_name_lower = bus_name.lower()
         load_name = f"load_{bus_name_lower}"
 
@@ -350,13 +438,10 @@ class OpenDSSCircuit:
             dss.Text.Command(f"disable Load.{load_name}")
 
             # Disable all lines connected to this bus
-            disabled_lines = []
-            for line_name in dss.Lines.AllNames():
-                dss.Lines.Name(line_name)
-                # A line is connected if its name contains the bus name in either Bus1 or Bus2 part
-                if f"_{bus_name_lower}_" in line_name or line_name.startswith(f"l_{bus_name_lower}_"):
-                     dss.Text.Command(f"disable Line.{line_name}")
-                     disabled_lines.append(line_name)
+            disabled_lines = [name for name, buses in self._line_buses.items() if bus_name_lower in buses]
+            for line_name in disabled_lines:
+                dss.Text.Command(f"disable Line.{line_name}")
+                del self._line_buses[line_name]
 
         except Exception as e:
             return {"status": "error", "message": f"OpenDSS error disabling elements for bus '{bus_name}': {e}"}
@@ -377,6 +462,7 @@ class OpenDSSCircuit:
             if bus_name_lower in bus_list:
                 self.neighborhood_data[nid].remove(bus_name_lower)
                 break
+        self._index_neighborhoods()
 
         message = f"Successfully deleted node '{bus_name}' and disabled {len(disabled_lines)} connected line(s)."
         print(message)
@@ -475,6 +561,12 @@ class OpenDSSCircuit:
 
         return action_taken
 
+    def _solve_power_flow(self):
+        """Solves the circuit and invalidates caches that depend on the solution."""
+        dss.Solution.Solve()
+        self._last_flow_cache = None
+        self._bus_name_set = None
+
     def _update_storage_devices_state(self):
         """Updates the energy levels of storage devices based on elapsed time using actual rates."""
         current_time = time.time()
@@ -519,28 +611,42 @@ class OpenDSSCircuit:
         """
         CORE METHOD: Solves power flow and automatically manages transformer overloads
         by first curtailing generation, then reducing load if necessary.
+        If the last solve ended stable ("OK"), nothing has changed since and no storage device is
+        charging or discharging, its result is returned as-is since solving again would reproduce it.
+        An "ALERT" or "ERROR" result is never reused, so every call keeps working on the overload.
         """
+        last_solve = self._last_solve
+        if (last_solve is not None and last_solve[:2] == (self._state_version, max_iterations)
+                and not any(device.get('active', True) for device in self.storage_devices.values())):
+            # Keep the storage clock where a solve would have left it
+            self.last_simulation_time = time.time()
+            return last_solve[2]
+
+        self._state_version += 1
+        result = self._solve_and_manage_loading(max_iterations)
+        self._last_solve = (self._state_version, max_iterations, result) if result.get('status') == "OK" else None
+        return result
+
+    def _solve_and_manage_loading(self, max_iterations: int) -> dict:
         self._update_storage_devices_state()
         management_log = []
-        self._disable_regulators()
 
         for i in range(max_iterations):
-            dss.Text.Command("Set Mode=Snap")
-            dss.Solution.Solve()
+            self._solve_power_flow()
 
             if not dss.Solution.Converged():
                 management_log.append("FATAL: Power flow failed to converge.")
                 self._update_transformer_statuses()
-                return {"status": "ERROR", "management_log": management_log}
+                return self._management_result("ERROR", management_log)
 
             # Pre-step: Dynamically restore generation to meet any new local load.
             if self._restore_generation_to_meet_load():
                 management_log.append(f"Iteration {i+1} (Pre-step): Restored generation to meet local load. Re-solving.")
-                dss.Solution.Solve()
+                self._solve_power_flow()
                 if not dss.Solution.Converged():
                     management_log.append("FATAL: Power flow failed to converge after restoring generation.")
                     self._update_transformer_statuses()
-                    return {"status": "ERROR", "management_log": management_log}
+                    return self._management_result("ERROR", management_log)
 
             overloads = self._check_transformer_overloads()
             self._update_transformer_statuses()
@@ -548,7 +654,7 @@ class OpenDSSCircuit:
             if not overloads:
                 status = "OK"
                 management_log.append(f"System stabilized in {i+1} iteration(s).")
-                return {"status": status, "management_log": management_log}
+                return self._management_result(status, management_log)
 
             management_log.append(f"Iteration {i+1}: Detected {len(overloads)} overloaded transformer(s).")
 
@@ -560,7 +666,12 @@ class OpenDSSCircuit:
             self._reduce_load_overloads(overloads, management_log)
 
         management_log.append(f"Warning: System could not be stabilized within the {max_iterations} iteration limit.")
-        return {"status": "ALERT", "management_log": management_log}
+        return self._management_result("ALERT", management_log)
+
+    @staticmethod
+    def _management_result(status: str, management_log: list) -> dict:
+        """Packs a management outcome with its full log and the final log line as a short summary."""
+        return {"status": status, "management_log": management_log, "summary": management_log[-1] if management_log else ""}
 
     def _curtail_generator_overloads(self, overloads: list, management_log: list) -> bool:
         """
@@ -572,7 +683,7 @@ class OpenDSSCircuit:
         exporting_neighborhoods = {}
         total_system_net_export = 0
         for hood_id in self.neighborhood_data.keys():
-            buses_in_hood = [b.lower() for b in self.neighborhood_data.get(hood_id, [])]
+            buses_in_hood = self._neighborhood_buses.get(hood_id, ())
             total_load = sum(self.bus_capacities.get(b, {}).get('load_kw', 0) for b in buses_in_hood)
             total_gen = sum(self.bus_capacities.get(b, {}).get('gen_kw', 0) for b in buses_in_hood)
             net_power = total_gen - total_load
@@ -622,7 +733,7 @@ class OpenDSSCircuit:
 
     def _reduce_neighborhood_load_by_amount(self, neighborhood_id: int, reduction_kw: float):
         """Reduces the load on net-importing buses within a neighborhood by a specific total amount, prioritizing storage."""
-        buses_in_neighborhood = [b.lower() for b in self.neighborhood_data.get(neighborhood_id, [])]
+        buses_in_neighborhood = self._neighborhood_buses.get(neighborhood_id, ())
 
         importing_buses_in_hood = {}
         total_net_import = 0
@@ -687,7 +798,7 @@ class OpenDSSCircuit:
 
     def _curtail_neighborhood_generation_by_amount(self, neighborhood_id: int, reduction_kw: float):
         """Reduces generation on net-exporting buses within a neighborhood by a specific total amount, prioritizing storage."""
-        buses_in_neighborhood = [b.lower() for b in self.neighborhood_data.get(neighborhood_id, [])]
+        buses_in_neighborhood = self._neighborhood_buses.get(neighborhood_id, ())
 
         exporting_buses = {}
         total_net_export_in_hood = 0
@@ -753,7 +864,8 @@ class OpenDSSCircuit:
 
     def modify_loads_in_neighborhood(self, neighborhood_id: int, factor: float) -> dict:
         """Modifies loads in a neighborhood and returns a summary of the changes."""
-        buses_in_neighborhood = [b.lower() for b in self.neighborhood_data.get(neighborhood_id, [])]
+        self._state_version += 1
+        buses_in_neighborhood = self._neighborhood_buses.get(neighborhood_id, ())
         if not buses_in_neighborhood:
             return {"status": "not_found", "message": f"Neighborhood {neighborhood_id} not found or is empty."}
 
@@ -761,8 +873,14 @@ class OpenDSSCircuit:
         unmodified_buses = []
         total_reduction_kw = 0
 
+        # Group loads by bus once and send all load edits to OpenDSS as one command block
+        loads_by_bus = {}
+        for load_name, bus_name in self.load_original_bus_map.items():
+            loads_by_bus.setdefault(bus_name, []).append(load_name)
+        load_edits = []
+
         for bus_name in buses_in_neighborhood:
-            result = self.modify_loads_in_houses(bus_name, factor)
+            result = self._reduce_bus_load(bus_name, loads_by_bus.get(bus_name, []), factor, False, load_edits)
             if result.get("status") == "success":
                 reduction = result.get("load_reduction_kw", 0)
                 total_reduction_kw += reduction
@@ -770,6 +888,9 @@ class OpenDSSCircuit:
             else:
                 unmodified_buses.append({"bus_name": bus_name, "reason": result.get("message")})
 
+        if load_edits:
+            dss.Text.Commands(load_edits)
+
         if not modified_buses:
              message = f"No loads were modified in neighborhood {neighborhood_id}."
         else:
@@ -789,12 +910,25 @@ class OpenDSSCircuit:
 
     def modify_loads_in_houses(self, house_bus_name: str, factor: float, is_auto_reduction: bool = False) -> dict:
         """Modifies the load on a single bus and returns details of the change."""
+        self._state_version += 1
+        bus_name_lower = house_bus_name.lower()
+        loads_on_this_bus = [ln for ln, ob in self.load_original_bus_map.items() if ob == bus_name_lower]
+        load_edits = []
+        result = self._reduce_bus_load(house_bus_name, loads_on_this_bus, factor, is_auto_reduction, load_edits)
+        if load_edits:
+            dss.Text.Commands(load_edits)
+        return result
+
+    def _reduce_bus_load(self, house_bus_name: str, loads_on_this_bus: list, factor: float, is_auto_reduction: bool, load_edits: list) -> dict:
+        """
+        Computes the load reduction for a single bus and appends the resulting OpenDSS
+        load edits to 'load_edits' for the caller to execute.
+        """
         bus_name_lower = house_bus_name.lower()
         bus_cap = self.bus_capacities.get(bus_name_lower)
         if not bus_cap or bus_cap['load_kw'] == 0:
             return {"status": "info", "message": f"No load found for bus '{house_bus_name}'."}
 
-        loads_on_this_bus = {ln: ob for ln, ob in self.load_original_bus_map.items() if ob == bus_name_lower}
         if not loads_on_this_bus:
             return {"status": "info", "message": f"No loads in simulation for bus '{house_bus_name}'."}
 
@@ -812,55 +946,78 @@ class OpenDSSCircuit:
                 return {"status": "no_change", "message": "Bus is not a net power importer."}
 
         if total_load_on_bus > 0 and reduction_amount > 0:
-            for load_name in loads_on_this_bus.keys():
+            for load_name in loads_on_this_bus:
                 dss.Loads.Name(load_name)
                 original_kw = dss.Loads.kW()
                 proportion = original_kw / total_load_on_bus
                 new_kw = original_kw - (reduction_amount * proportion)
-                dss.Text.Command(f"edit Load.{load_name} kW={new_kw}")
+                load_edits.append(f"edit Load.{load_name} kW={new_kw}")
 
         self.bus_capacities[bus_name_lower]['load_kw'] -= reduction_amount
         return {"status": "success", "message": f"Load modified on bus {house_bus_name}.", "load_reduction_kw": round(reduction_amount, 2)}
 
-    def get_buses_with_loads(self) -> pd.DataFrame:
-        """Gets all buses with voltage info, power info from the logical model, and connected elements."""
-        bus_data = []
+    def _collect_bus_columns(self) -> dict:
+        """
+        Returns the per-bus columns for the current state, collecting them only when the
+        circuit has changed since the last call. The NumPy columns are read-only because
+        they are shared between callers.
+        """
+        cached = self._bus_columns_cache
+        if cached is not None and cached[0] == self._state_version:
+            return cached[1]
+        columns = self._build_bus_columns()
+        for col in columns.values():
+            if isinstance(col, np.ndarray):
+                col.flags.writeable = False
+        self._bus_columns_cache = (self._state_version, columns)
+        return columns
+
+    def _build_bus_columns(self) -> dict:
+        """
+        Gathers per-bus voltage info, power info from the logical model, and connected elements
+        as a dict of columns. Returns an empty dict when no bus has nodes.
+        """
         all_bus_names = [b.lower() for b in dss.Circuit.AllBusNames() if "_sec" not in b.lower()]
         num_dfps = len(self.dfps)
 
+        # Fetch voltages for every node in bulk. A bus is reported by its lowest-numbered node,
+        # which is what puVmagAngle() returns first for that bus. AllNodeNames lists a bus's nodes
+        # in the order they were referenced (e.g. 39.2, 39.1, 39.3), so the first entry isn't enough.
+        node_names = dss.Circuit.AllNodeNames()
+        node_mag_pu = np.asarray(dss.Circuit.AllBusMagPu())
+        node_volts = np.asarray(dss.Circuit.AllBusVolts()).reshape(-1, 2)
+
+        first_node_index = {}
+        first_node_number = {}
+        for i, node_name in enumerate(node_names):
+            bus, _, node = node_name.lower().partition('.')
+            number = int(node) if node.isdigit() else 0
+            if bus not in first_node_number or number < first_node_number[bus]:
+                first_node_number[bus] = number
+                first_node_index[bus] = i
+
+        # Keep every bus's subscription list sized to the current DFP registry
         for bus_name in all_bus_names:
-            dss.Circuit.SetActiveBus(bus_name)
-            nodes_on_bus = dss.Bus.Nodes()
-            pu_voltages = dss.Bus.puVmagAngle()
-
-            x_coord = dss.Bus.X()
-            y_coord = dss.Bus.Y()
-
-            caps = self.bus_capacities.get(bus_name, {'load_kw': 0, 'gen_kw': 0})
-            total_load_kw = caps['load_kw']
-            total_gen_kw = caps['gen_kw']
-            net_power_kw = total_gen_kw - total_load_kw
-
             dfps_list = self.bus_dfps.setdefault(bus_name, [0] * num_dfps)
             if len(dfps_list) != num_dfps:
-                dfps_list = (dfps_list + [0] * num_dfps)[:num_dfps]
-                self.bus_dfps[bus_name] = dfps_list
-
-            if nodes_on_bus:
-                bus_data.append({
-                    'Bus': bus_name,
-                    'Coordinates': {'X': x_coord, 'Y': y_coord},
-                    'DFPs': dfps_list,
-                    'VMag_pu': pu_voltages[0], 'VAngle': pu_voltages[1],
-                    'Load_kW': total_load_kw, 'Gen_kW': total_gen_kw, 'Net_Power_kW': net_power_kw
-                })
+                self.bus_dfps[bus_name] = (dfps_list + [0] * num_dfps)[:num_dfps]
+
+        buses = [bus for bus in all_bus_names if bus in first_node_index]
+        if not buses: return {}
 
-        if not bus_data: return pd.DataFrame()
+        # Build each column as a typed array rather than assembling per-bus row dicts
+        num_buses = len(buses)
+        node_index = np.fromiter((first_node_index[bus] for bus in buses), dtype=np.intp, count=num_buses)
+        no_caps = {'load_kw': 0, 'gen_kw': 0}
+        load_kw = np.fromiter((self.bus_capacities.get(bus, no_caps)['load_kw'] for bus in buses), dtype=np.float64, count=num_buses)
+        gen_kw = np.fromiter((self.bus_capacities.get(bus, no_caps)['gen_kw'] for bus in buses), dtype=np.float64, count=num_buses)
 
-        buses_df = pd.DataFrame(bus_data)
-        device_map = {bus: self.devices.get(bus, []) for bus in all_bus_names}
+        coordinates = []
+        for bus in buses:
+            coords = self.bus_coords.get(bus, {})
+            coordinates.append({'X': coords.get('X', 0), 'Y': coords.get('Y', 0)})
 
-        storage_map = {bus: [] for bus in all_bus_names}
+        storage_map = {bus: [] for bus in buses}
         for name, details in self.storage_devices.items():
             bus = details['bus_name']
             if bus in storage_map:
@@ -875,28 +1032,63 @@ class OpenDSSCircuit:
                     'actual_discharge_rate': details.get('actual_discharge_rate', 0)
                 })
 
-        transformer_map = {}
-        for bus in all_bus_names:
-            names = self.bus_transformers.get(bus, [])
-            transformer_map[bus] = [self.transformer_statuses.get(name) for name in names if self.transformer_statuses.get(name)]
+        transformers = []
+        for bus in buses:
+            statuses = (self.transformer_statuses.get(name) for name in self.bus_transformers.get(bus, []))
+            transformers.append([status for status in statuses if status])
 
-        buses_df['Devices'] = buses_df['Bus'].map(device_map)
-        buses_df['Transformers'] = buses_df['Bus'].map(transformer_map)
-        buses_df['StorageDevices'] = buses_df['Bus'].map(storage_map)
+        return {
+            'Bus': buses,
+            'Coordinates': coordinates,
+            'DFPs': [self.bus_dfps[bus] for bus in buses],
+            'VMag_pu': node_mag_pu[node_index],
+            'VAngle': np.degrees(np.arctan2(node_volts[node_index, 1], node_volts[node_index, 0])),
+            'Load_kW': load_kw,
+            'Gen_kW': gen_kw,
+            'Net_Power_kW': gen_kw - load_kw,
+            'Devices': [self.devices.get(bus, []) for bus in buses],
+            'Transformers': transformers,
+            'StorageDevices': [storage_map[bus] for bus in buses]
+        }
+
+    def get_buses_with_loads(self) -> pd.DataFrame:
+        """Gets all buses with voltage info, power info from the logical model, and connected elements."""
+        columns = self._collect_bus_columns()
+        if not columns: return pd.DataFrame()
+        # The cached columns are shared and read-only, so the frame gets its own copy
+        return pd.DataFrame(columns, copy=True)
+
+    def get_bus_state_snapshot(self) -> dict:
+        """
+        Returns the per-bus records together with the voltage statistics, which are reduced
+        directly from the voltage column instead of being re-read from the records.
+        """
+        columns = self._collect_bus_columns()
+        vmag_pu = columns.get('VMag_pu')
+        if vmag_pu is None or not vmag_pu.size:
+            return {"records": [], "vmin": 0, "vmax": 0, "vmean": 0}
+        return {
+            "records": self._records_from_columns(columns),
+            "vmin": float(vmag_pu.min()),
+            "vmax": float(vmag_pu.max()),
+            "vmean": float(vmag_pu.mean())
+        }
 
-        buses_df['Transformers'] = buses_df['Transformers'].apply(lambda d: d if isinstance(d, list) else [])
-        buses_df['Devices'] = buses_df['Devices'].apply(lambda d: d if isinstance(d, list) else [])
-        buses_df['StorageDevices'] = buses_df['StorageDevices'].apply(lambda d: d if isinstance(d, list) else [])
+    @staticmethod
+    def _records_from_columns(columns: dict) -> list:
+        """Zips a dict of columns into one dict per row, converting NumPy columns to Python values."""
+        if not columns: return []
 
-        return buses_df
+        names = list(columns)
+        values = [col.tolist() if isinstance(col, np.ndarray) else col for col in columns.values()]
+        return [dict(zip(names, row)) for row in zip(*values)]
 
 
     def get_single_bus_details(self, bus_name: str) -> dict:
         """Gets detailed information for a single bus."""
         bus_name_lower = bus_name.lower()
-        all_bus_names = [b.lower() for b in dss.Circuit.AllBusNames()]
 
-        if bus_name_lower not in all_bus_names:
+        if bus_name_lower not in self._get_bus_name_set():
             return {} # Return empty dict if bus not found
 
         dss.Circuit.SetActiveBus(bus_name_lower)
@@ -957,6 +1149,7 @@ class OpenDSSCircuit:
 
     def add_device_to_bus(self, bus_name: str, device_name: str, kw: float, phases: int) -> dict:
         """Adds a new load (device) to the correct transformer secondary bus and returns confirmation."""
+        self._state_version += 1
         primary_bus_lower = bus_name.lower()
 
         # Check if a device with the same name already exists on this bus
@@ -964,7 +1157,7 @@ class OpenDSSCircuit:
         if any(d.get('device_name') == device_name for d in existing_devices):
             return {"status": "error", "message": f"Device with name '{device_name}' already exists at node (bus) '{bus_name}'."}
 
-        neighborhood_id = next((nid for nid, buses in self.neighborhood_data.items() if primary_bus_lower in [b.lower() for b in buses]), None)
+        neighborhood_id = self._bus_neighborhood.get(primary_bus_lower)
         if neighborhood_id is None:
             return {"status": "error", "message": f"Bus '{primary_bus_lower}' not found in any known neighborhood."}
 
@@ -1004,6 +1197,7 @@ class OpenDSSCircuit:
 
     def disconnect_device_from_bus(self, bus_name: str, device_name: str) -> dict:
         """Removes a device from the simulation and returns a confirmation."""
+        self._state_version += 1
         primary_bus_lower = bus_name.lower()
 
         device_list = self.devices.get(primary_bus_lower, [])
@@ -1045,6 +1239,7 @@ class OpenDSSCircuit:
 
     def add_generation_to_bus(self, bus_name: str, kw: float, phases: int) -> dict:
         """Adds a new generator and returns a confirmation message."""
+        self._state_version += 1
         bus_name_lower = bus_name.lower()
         gen_name = f"Gen_{bus_name_lower.replace('.', '_')}_{kw:.0f}kW"
 
@@ -1096,6 +1291,7 @@ class OpenDSSCircuit:
 
     def add_storage_device(self, bus_name: str, device_name: str, max_capacity_kwh: float, charge_rate_kw: float, discharge_rate_kw: float) -> dict:
         """Adds a new storage device to the grid and returns a confirmation."""
+        self._state_version += 1
         primary_bus_lower = bus_name.lower()
         device_name_lower = device_name.lower().replace(' ', '_')
 
@@ -1112,7 +1308,7 @@ class OpenDSSCircuit:
         gen_name = f"stor_gen_{primary_bus_lower}_{device_name_lower}"
         # --- End of Change ---
 
-        neighborhood_id = next((nid for nid, buses in self.neighborhood_data.items() if primary_bus_lower in [b.lower() for b in buses]), None)
+        neighborhood_id = self._bus_neighborhood.get(primary_bus_lower)
         if neighborhood_id is None:
             return {"status": "error", "message": f"Bus '{bus_name}' not found in any neighborhood."}
 
@@ -1156,6 +1352,7 @@ class OpenDSSCircuit:
 
     def _disconnect_storage_device(self, bus_name: str, device_name: str) -> dict:
         """NEW: Disconnects a storage device entirely from the simulation."""
+        self._state_version += 1
         bus_name_lower = bus_name.lower()
         device_name_lower = device_name.lower().replace(' ', '_')
         unique_key = f"{bus_name_lower}::{device_name_lower}"
@@ -1193,6 +1390,7 @@ class OpenDSSCircuit:
         Toggles a storage device between load and generator modes, or disconnects it.
         'action' can be 'toggle' or 'disconnect'.
         """
+        self._state_version += 1
         if action.lower() == 'disconnect':
             return self._disconnect_storage_device(bus_name, device_name)
 
@@ -1251,9 +1449,9 @@ class OpenDSSCircuit:
 
     def subscribe_dfp(self, bus_name: str, dfp_name: str) -> dict:
         """Subscribes a bus to a DFP by its name."""
+        self._state_version += 1
         bus_name_lower = bus_name.lower()
-        all_buses = [b.lower() for b in dss.Circuit.AllBusNames()]
-        if bus_name_lower not in all_buses:
+        if bus_name_lower not in self._get_bus_name_set():
             return {"status": "error", "message": f"Bus '{bus_name}' not found."}
 
         target_dfp = next((dfp for dfp in self.dfps if dfp['name'].lower() == dfp_name.lower()), None)
@@ -1272,9 +1470,9 @@ class OpenDSSCircuit:
 
     def unsubscribe_dfp(self, bus_name: str, dfp_name: str) -> dict:
         """Unsubscribes a bus from a DFP by its name."""
+        self._state_version += 1
         bus_name_lower = bus_name.lower()
-        all_buses = [b.lower() for b in dss.Circuit.AllBusNames()]
-        if bus_name_lower not in all_buses:
+        if bus_name_lower not in self._get_bus_name_set():
             return {"status": "error", "message": f"Bus '{bus_name}' not found."}
 
         target_dfp = next((dfp for dfp in self.dfps if dfp['name'].lower() == dfp_name.lower()), None)
@@ -1295,6 +1493,7 @@ class OpenDSSCircuit:
 
     def register_dfp(self, name: str, description: str, min_power_kw: float, target_pf: float):
         """Registers a new DFP. The index is determined by its position in the list."""
+        self._state_version += 1
         dfp_index = len(self.dfps) + 1
         dfp_details = {
             "index": dfp_index,
@@ -1310,6 +1509,7 @@ class OpenDSSCircuit:
 
     def update_dfp(self, name: str, new_min_power_kw: float, new_target_pf: float, new_description: str = None) -> dict:
         """NEW: Updates the parameters of an existing DFP identified by its name."""
+        self._state_version += 1
         dfp_to_update = next((dfp for dfp in self.dfps if dfp['name'].lower() == name.lower()), None)
 
         if not dfp_to_update:
@@ -1327,6 +1527,7 @@ class OpenDSSCircuit:
         """
         NEW: Deletes a DFP by its name and re-indexes all subsequent DFPs and bus subscriptions.
         """
+        self._state_version += 1
         dfp_to_delete_index = -1
         for i, dfp in enumerate(self.dfps):
             if dfp['name'].lower() == name.lower():
@@ -1339,8 +1540,9 @@ class OpenDSSCircuit:
         self.dfps.pop(dfp_to_delete_index)
         print(f"DFP '{name}' removed from registry.")
 
-        for i in range(dfp_to_delete_index, len(self.dfps)):
-            self.dfps[i]['index'] -= 1
+        # A DFP's index is its 1-based position in the registry
+        for position, dfp in enumerate(self.dfps[dfp_to_delete_index:], start=dfp_to_delete_index + 1):
+            dfp['index'] = position
 
         for bus, subscriptions in self.bus_dfps.items():
             if len(subscriptions) > dfp_to_delete_index:
@@ -1353,6 +1555,7 @@ class OpenDSSCircuit:
         """
         Reduces the load for all devices in a specific bus that are above a given power threshold.
         """
+        self._state_version += 1
         bus_name_lower = bus_name.lower()
         devices_on_bus = self.devices.get(bus_name_lower, [])
         if not devices_on_bus:
@@ -1397,6 +1600,7 @@ class OpenDSSCircuit:
         and returns the participation status for each bus.
         If a neighborhood_id is provided, it only executes on subscribed buses within that neighborhood.
         """
+        self._state_version += 1
         target_dfp = next((dfp for dfp in self.dfps if dfp['name'].lower() == dfp_name.lower()), None)
         if not target_dfp:
             return {"status": "error", "message": f"DFP with name '{dfp_name}' not found."}
@@ -1416,7 +1620,7 @@ class OpenDSSCircuit:
             if neighborhood_id not in self.neighborhood_data:
                 return {"status": "error", "message": f"Neighborhood with ID '{neighborhood_id}' not found."}
 
-            buses_in_neighborhood = {b.lower() for b in self.neighborhood_data[neighborhood_id]}
+            buses_in_neighborhood = self._neighborhood_sets[neighborhood_id]
             # Find the intersection of subscribed buses and buses in the specified neighborhood
             target_buses = [bus for bus in all_subscribed_buses if bus.lower() in buses_in_neighborhood]
 
@@ -1460,6 +1664,7 @@ class OpenDSSCircuit:
         """
         Sends a DFP to a neighbourhood, randomly subscribing buses.
         """
+        self._state_version += 1
         # 1. Validate the DFP
         target_dfp = next((dfp for dfp in self.dfps if dfp['name'].lower() == dfp_name.lower()), None)
         if not target_dfp:
@@ -1474,7 +1679,7 @@ class OpenDSSCircuit:
         # 3. Iterate and subscribe randomly
         subscription_log = []
         subscribed_count = 0
-        all_circuit_buses = [b.lower() for b in dss.Circuit.AllBusNames()]
+        all_circuit_buses = self._get_bus_name_set()
 
         for bus_name in buses_in_neighbourhood:
             # Ensure bus exists in the simulation before trying to subscribe
@@ -1499,9 +1704,25 @@ class OpenDSSCircuit:
         }
 
     def get_power_flow_results(self) -> dict:
-        """Returns key power flow results from the circuit."""
-        total_p, _ = dss.Circuit.TotalPower()
-        return {'converged': dss.Solution.Converged(), 'total_power_kW': total_p, 'total_losses_kW': dss.Circuit.Losses()[0]/1000}
+        """Returns key power flow results from the circuit, cached until the next solve."""
+        if self._last_flow_cache is None:
+            self._last_flow_cache = {
+                'converged': dss.Solution.Converged(),
+                'total_power_kW': dss.Circuit.TotalPower()[0],
+                'total_losses_kW': dss.Circuit.Losses()[0] * 1e-3
+            }
+        return dict(self._last_flow_cache)
+
+    def get_capacity_totals(self) -> tuple:
+        """Returns (total_load_kw, total_gen_kw) over all buses, summed in one pass over bus_capacities."""
+        if not self.bus_capacities:
+            return 0.0, 0.0
+        caps = np.fromiter(
+            (value for v in self.bus_capacities.values() for value in (v.get('load_kw', 0), v.get('gen_kw', 0))),
+            dtype=np.float64, count=2 * len(self.bus_capacities)
+        ).reshape(-1, 2)
+        total_load_kw, total_gen_kw = caps.sum(axis=0)
+        return float(total_load_kw), float(total_gen_kw)
 
     def get_system_capacity_info(self) -> dict:
         """
@@ -1528,6 +1749,7 @@ class OpenDSSCircuit:
         within a specified neighborhood or across the entire system if no neighborhood is specified.
         Buses remain subscribed to the DFP.
         """
+        self._state_version += 1
         # Find the target DFP
         target_dfp = next((dfp for dfp in self.dfps if dfp['name'].lower() == dfp_name.lower()), None)
         if not target_dfp:
@@ -1543,7 +1765,7 @@ class OpenDSSCircuit:
                 return {"status": "error", "message": f"Neighborhood with ID '{neighborhood_id}' not found."}
             
             # Get all buses in the neighborhood
-            buses_to_process = [b.lower() for b in self.neighborhood_data[neighborhood_id]]
+            buses_to_process = self._neighborhood_buses[neighborhood_id]
         else:
             # Process all buses that are subscribed to this DFP
             buses_to_process = [b for b, subs in self.bus_dfps.items() 
@@ -1588,7 +1810,7 @@ class OpenDSSCircuit:
                             })
         
         # Solve the power flow to update the system state
-        dss.Solution.Solve()
+        self._solve_power_flow()
         
         # Generate appropriate response message
         message = f"Stopped DFP '{dfp_name}'. Restored original load for {restored_count} device(s)."
@@ -1652,6 +1874,7 @@ class OpenDSSCircuit:
         Applies a saved state to the circuit object. First, it replays commands to
         recreate dynamically added elements, then restores the Python-level state.
         """
+        self._state_version += 1
         # Step 1: Restore the Python-level state. This is done first so that any
         # subsequent logic has access to the correct state variables.
         self.devices = state.get("devices", {})
@@ -1678,6 +1901,8 @@ class OpenDSSCircuit:
                     dss.Text.Command(cmd)
                 except Exception as e:
                     print(f"Warning: Could not execute dynamic command: '{cmd}'. Error: {e}")
+            self._map_line_buses()
+            self._bus_name_set = None
             print("Dynamic elements restored.")
 
         print("Circuit state successfully loaded from cache.")
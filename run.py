@@ -1,19 +1,13 @@
 import os
-import pickle
 import sys
-import pandas as pd
-from flask import Flask, request, jsonify
-from main import OpenDSSCircuit
 import time
-import requests
-import zipfile
-from werkzeug.utils import secure_filename
+import threading
+from flask import Flask, g, has_request_context, request
 from flask_cors import CORS
+from flask_compress import Compress
 
-
-# --- Global Application Setup ---
-app = Flask(__name__)
-CORS(app, origins=["http://localhost:3000", "http://localhost:3001"])  # Allow CORS for multiple frontends
+# --- Paths ---
+# Computed once; the project root also goes on the Python path for the local imports below
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 RESULTS_DIR = os.path.join(BASE_DIR, 'results_api')
 TEST_SYSTEMS_DIR = os.path.join(BASE_DIR, 'Test_Systems')
@@ -21,10 +15,7 @@ CACHE_DIR = os.path.join(BASE_DIR, 'cache')
 os.makedirs(RESULTS_DIR, exist_ok=True)
 os.makedirs(TEST_SYSTEMS_DIR, exist_ok=True)
 os.makedirs(CACHE_DIR, exist_ok=True)
-
-# Add the project's root directory to the Python path for correct imports
-project_root = os.path.dirname(os.path.abspath(__file__))
-sys.path.insert(0, project_root)
+sys.path.insert(0, BASE_DIR)
 
 from main import OpenDSSCircuit
 from utils import (
@@ -34,23 +25,26 @@ from utils import (
     save_critical_transformers_report,
     save_dfp_registry_to_file,
     log_dfp_activity,
-    check_and_report_critical_transformers
+    check_and_report_critical_transformers,
+    MANAGEMENT_LOG_FILE,
+    STATE_REPORT_FILE,
+    CRITICAL_REPORT_FILE,
+    DFP_REGISTRY_FILE
 )
 from api.utility_routes import create_utility_blueprint
 from api.user_routes import create_user_blueprint
 from api.dashboard_routes import create_dashboard_blueprint
+from api.json_provider import OrjsonProvider
 
 # --- Global Application Setup ---
 app = Flask(__name__)
+CORS(app, origins=["http://localhost:3000", "http://localhost:3001"])  # Allow CORS for multiple frontends
+app.json = OrjsonProvider(app)
+# Responses carrying bus_details are large; compress them with Brotli when the client accepts it, else gzip
+app.config['COMPRESS_MIN_SIZE'] = 2048
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+Compress(app)
 
-# Define directories
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-RESULTS_DIR = os.path.join(BASE_DIR, 'results_api')
-TEST_SYSTEMS_DIR = os.path.join(BASE_DIR, 'Test_Systems')
-CACHE_DIR = os.path.join(BASE_DIR, 'cache')
-os.makedirs(RESULTS_DIR, exist_ok=True)
-os.makedirs(TEST_SYSTEMS_DIR, exist_ok=True)
-os.makedirs(CACHE_DIR, exist_ok=True)
 CRITICAL_API_ENDPOINT = "http://localhost:3000/api/critical"
 
 # --- Global Circuit Initialization ---
@@ -58,27 +52,62 @@ print("--- Initializing Global OpenDSS Circuit ---")
 # Use a dictionary to hold the circuit instance, making it mutable across modules
 circuit_ref = {'instance': OpenDSSCircuit("")}
 management_status = {'status': None}
+# Serializes every request that touches the circuit
+circuit_lock = threading.RLock()
+# The last completed simulation run, so requests that queued behind it can share its result
+last_run = {'count': 0, 'version': None, 'details': None}
+
+# Endpoints that never touch the circuit; they, CORS preflights and unmatched URLs don't wait for the lock
+_CIRCUIT_FREE_ENDPOINTS = frozenset(('static', 'dashboard_bp.upload_test_system'))
+
+@app.before_request
+def _acquire_circuit_lock():
+    if request.method == 'OPTIONS' or request.endpoint is None or request.endpoint in _CIRCUIT_FREE_ENDPOINTS:
+        return
+    runs_before_wait = last_run['count']
+    circuit_lock.acquire()
+    g.holds_circuit_lock = True
+    g.runs_before_wait = runs_before_wait
+
+@app.teardown_request
+def _release_circuit_lock(exc):
+    if g.pop('holds_circuit_lock', False):
+        circuit_lock.release()
 
 def run_and_update_state():
     """Central function to run simulation and update all reports."""
+    with circuit_lock:
+        # A run that finished while this request waited for the lock, with no change to the
+        # circuit since, already holds the current results
+        if (has_request_context() and g.get('runs_before_wait', last_run['count']) != last_run['count']
+                and last_run['version'] == circuit_ref['instance']._state_version):
+            return last_run['details']
+        return _run_and_update_state()
+
+def _run_and_update_state():
     current_circuit = circuit_ref['instance']
     sim_status = current_circuit.solve_and_manage_loading()
     management_status['status'] = sim_status
-    
-    if 'management_log' in sim_status:
-        save_management_log_to_file(sim_status['management_log'], "management_log.txt", RESULTS_DIR)
-
     current_details = get_current_state_details(current_circuit, sim_status)
-    save_state_to_file(current_details, "latest_api_results.txt", RESULTS_DIR)
-    # Add the call to generate critical.txt
-    save_critical_transformers_report(current_details, "critical.txt", RESULTS_DIR)
+
+    # The same details object means the circuit hasn't changed since the last run, so its reports are current
+    if current_details is not last_run['details']:
+        if 'management_log' in sim_status:
+            save_management_log_to_file(sim_status['management_log'], MANAGEMENT_LOG_FILE, RESULTS_DIR)
+
+        # Stamp both reports from this run with the same time
+        report_time = time.strftime('%Y-%m-%d %H:%M:%S')
+        save_state_to_file(current_details, STATE_REPORT_FILE, RESULTS_DIR, report_time)
+        # Add the call to generate critical.txt
+        save_critical_transformers_report(current_details, CRITICAL_REPORT_FILE, RESULTS_DIR, report_time)
     check_and_report_critical_transformers(current_details, RESULTS_DIR, CRITICAL_API_ENDPOINT)
-    
+
+    last_run.update(count=last_run['count'] + 1, version=current_circuit._state_version, details=current_details)
     return current_details
 
 # Run once at startup
 run_and_update_state()
-save_dfp_registry_to_file(circuit_ref['instance'], "dfp_registry.txt", RESULTS_DIR)
+save_dfp_registry_to_file(circuit_ref['instance'], DFP_REGISTRY_FILE, RESULTS_DIR)
 print("--- Initial Baseline Simulation Complete ---")
 
 # --- Register Blueprints ---
@@ -1,22 +1,174 @@
 import os
+import sys
 import time
+import hashlib
+import functools
+import queue
+import atexit
+import logging
+import logging.handlers
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- Report Files ---
+# Names of the reports written to the results directory
+MANAGEMENT_LOG_FILE = "management_log.txt"
+STATE_REPORT_FILE = "latest_api_results.txt"
+CRITICAL_REPORT_FILE = "critical.txt"
+DFP_REGISTRY_FILE = "dfp_registry.txt"
+DFP_LOG_FILE = "dfps_logs.txt"
+
+# --- Report Layout Constants ---
+# Banners and headers that don't depend on the data are built once at import time.
+_BANNER = '=' * 120
+_SECTION_RULE = '=' * 25
+_HOOD_RULE = '-' * 20
+_MANAGEMENT_LOG_HEADER = f"{_BANNER}\nDETAILED MANAGEMENT LOG\n{_BANNER}\n"
+_DFP_REGISTRY_TITLE = f"{_BANNER}\nDEMAND FLEXIBILITY PROGRAM (DFP) REGISTRY\n{_BANNER}\n"
+_DFP_HEADER = f"{'Index':<10}{'Name':<30}{'Description':<50}{'Min Power (kW)':<20}{'Target PF':<15}{'Registered At':<25}"
+_DFP_DIVIDER = '-' * len(_DFP_HEADER)
+# Row templates are parsed once and bound to their format method for reuse in the per-row loops
+_DFP_ROW_FMT = "{:<10}{:<30}{:<50}{:<20.2f}{:<15.2f}{:<25}\n".format
+_CRITICAL_LINE_FMT = "  - Transformer '{}' on Bus '{}': Status: {}, Loading: {:.2f}% ({:.2f}/{:.2f} kVA)".format
+_CRITICAL_REPORT_RULE = '=' * 55
+# Transformer statuses that are listed in the critical reports
+_ALERT_STATUSES = frozenset(("Critical", "Warning", "Overloaded"))
+# Per-neighborhood bus table in the state report: fixed headers and the templates used for every bus row
+_STATE_TABLE_HEADERS = ("Bus", "VMag (pu)", "Load (kW)", "Gen (kW)", "Net (kW)", "Subscribed DFPs", "Components")
+_VMAG_FMT = "{:.4f}".format
+_KW_FMT = "{:.2f}".format
+_XFMR_PART_FMT = "XFMR:'{}'({},{:.1f}%)".format
+_DEV_PART_FMT = "DEV:'{}'({:.1f}kW)".format
+_STOR_PART_FMT = "STOR:'{}'({},{:.1f}%)".format
+
+# --- Logging ---
+# Report and alert messages go through a queue to a listener thread that does the console write,
+# so a slow terminal never holds up a request. Messages print to stdout as plain text, as before.
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+@functools.lru_cache(maxsize=None)
+def _report_path(results_dir: str, filename: str) -> str:
+    """Joins a report filename onto its directory; the handful of report paths are built once and reused."""
+    return os.path.join(results_dir, filename)
+
+# --- Background Report Writer ---
+# Report files are handed to a single writer thread so disk I/O stays off the request path.
+# Each file is written to a temporary sibling and renamed over the target, so readers never see a partial report.
+# The queue carries file paths; the text and its body digest live in _pending_writes so a newer report
+# replaces one not yet written. A digest moves to _last_report_digests only once its file is on disk.
+_io_queue = queue.Queue()
+_pending_writes = {}
+_pending_lock = threading.Lock()
+_last_report_digests = {}
+# O_BINARY keeps Windows from translating newlines; it doesn't exist (and isn't needed) elsewhere
+_REPORT_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+def _queue_report_write(filepath: str, text: str, digest: bytes):
+    with _pending_lock:
+        if filepath not in _pending_writes:
+            _io_queue.put(filepath)
+        _pending_writes[filepath] = (text, digest)
+
+def _write_file_atomic(filepath: str, text: str):
+    # Encode once and write the bytes straight to the file descriptor, bypassing Python's buffered file layer
+    data = memoryview(text.encode('utf-8'))
+    tmp_path = filepath + '.tmp'
+    fd = os.open(tmp_path, _REPORT_OPEN_FLAGS, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, filepath)
+
+def _report_writer():
+    while True:
+        filepath = _io_queue.get()
+        try:
+            with _pending_lock:
+                text, digest = _pending_writes.pop(filepath)
+            _write_file_atomic(filepath, text)
+            _last_report_digests[filepath] = digest
+        except Exception as e:
+            # Any failure is logged rather than raised, so the writer keeps serving the queue.
+            # Forget the old digest so the next save retries instead of trusting a file that may be stale
+            _last_report_digests.pop(filepath, None)
+            logger.error(f"Error writing report to {filepath}: {e}")
+        finally:
+            _io_queue.task_done()
+
+def _report_digest(body: str) -> bytes:
+    return hashlib.blake2b(body.encode('utf-8'), digest_size=16).digest()
+
+def _report_unchanged(filepath: str, digest: bytes) -> bool:
+    """Returns True if 'digest' matches the body queued for 'filepath', or the last one written if none is queued."""
+    with _pending_lock:
+        pending = _pending_writes.get(filepath)
+        if pending is not None:
+            return pending[1] == digest
+    return _last_report_digests.get(filepath) == digest
+
+def flush_report_writes():
+    """Blocks until every queued report has been written to disk."""
+    _io_queue.join()
+
+threading.Thread(target=_report_writer, name="report-writer", daemon=True).start()
+atexit.register(flush_report_writes)
+
+# Critical alerts are posted from a single background worker so the external round-trip
+# (up to the 5 s timeout) never delays the HTTP response. While an alert waits for the worker,
+# newer alerts to the same endpoint replace its payload. Pending alerts are sent before exit.
+_alert_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="critical-alert")
+atexit.register(_alert_pool.shutdown)
+# Only the alert worker posts, so one keep-alive session reuses the connection to the endpoint
+_alert_session = requests.Session()
+_alert_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=Retry(total=1, backoff_factor=0.1))
+_alert_session.mount('http://', _alert_adapter)
+_alert_session.mount('https://', _alert_adapter)
+# Latest alert payload per endpoint that hasn't been picked up yet; a newer alert replaces it
+_pending_alerts = {}
+_pending_alerts_lock = threading.Lock()
+
+# Last state summary built, reused while the circuit and management status are unchanged
+_state_details_cache = {'circuit': None, 'version': None, 'management_status': None, 'details': None}
 
 def get_current_state_details(circuit, management_status: dict) -> dict:
     """Helper function to gather results and include the management status."""
+    cache = _state_details_cache
+    if (cache['circuit'] is circuit and cache['version'] == circuit._state_version
+            and cache['management_status'] is management_status):
+        return cache['details']
+
+    details = _build_state_details(circuit, management_status)
+    cache.update(circuit=circuit, version=circuit._state_version,
+                 management_status=management_status, details=details)
+    return details
+
+def _build_state_details(circuit, management_status: dict) -> dict:
     pf_results = circuit.get_power_flow_results()
-    buses_df = circuit.get_buses_with_loads()
+    snapshot = circuit.get_bus_state_snapshot()
+    bus_records = snapshot['records']
     capacity_info = circuit.get_system_capacity_info()
 
-    total_load_kw = sum(v.get('load_kw', 0) for v in circuit.bus_capacities.values())
-    total_gen_kw = sum(v.get('gen_kw', 0) for v in circuit.bus_capacities.values())
+    total_load_kw, total_gen_kw = circuit.get_capacity_totals()
     total_power_kw = pf_results.get('total_power_kW', 0)
     max_power_kva = capacity_info.get('maximum_circuit_power_kVA', 0)
     
     circuit_loading_percent = (total_power_kw / max_power_kva) * 100 if max_power_kva > 0 else 0
 
     return {
-        "management_status": management_status,
+        # The full log is written to management_log.txt; responses carry only the status and summary line
+        "management_status": {k: v for k, v in management_status.items() if k != 'management_log'},
         "dfp_registry": circuit.get_all_dfp_details(),
         "power_summary": {
             "converged": pf_results.get('converged', False),
@@ -29,62 +181,72 @@ def get_current_state_details(circuit, management_status: dict) -> dict:
             "circuit_loading_percent": round(circuit_loading_percent, 2)
         },
         "voltage_profile": {
-            "min_voltage_pu": round(buses_df['VMag_pu'].min(), 4) if not buses_df.empty else 0,
-            "max_voltage_pu": round(buses_df['VMag_pu'].max(), 4) if not buses_df.empty else 0,
-            "avg_voltage_pu": round(buses_df['VMag_pu'].mean(), 4) if not buses_df.empty else 0,
+            "min_voltage_pu": round(snapshot['vmin'], 4),
+            "max_voltage_pu": round(snapshot['vmax'], 4),
+            "avg_voltage_pu": round(snapshot['vmean'], 4),
         },
         "neighborhood_details": circuit.neighborhood_data,
-        "bus_details": buses_df.to_dict(orient='records')
+        "bus_details": bus_records
     }
 
 def save_management_log_to_file(management_log: list, filename: str, results_dir: str):
-    filepath = os.path.join(results_dir, filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(f"{'='*120}\nDETAILED MANAGEMENT LOG\n{'='*120}\n")
-        if management_log:
-            f.write("\n".join(management_log))
-        else:
-            f.write("- No management actions were logged.")
-    print(f"Detailed log saved to file: {filepath}")
-
-def save_state_to_file(state_details: dict, filename: str, results_dir: str):
-    """Formats and saves the current detailed state summary to a text file."""
-    filepath = os.path.join(results_dir, filename)
-    output = []
-    
+    filepath = _report_path(results_dir, filename)
+    body = "\n".join(management_log) if management_log else "- No management actions were logged."
+    digest = _report_digest(body)
+    if _report_unchanged(filepath, digest):
+        logger.info(f"Detailed log unchanged, not rewritten: {filepath}")
+        return
+    _queue_report_write(filepath, _MANAGEMENT_LOG_HEADER + body, digest)
+    logger.info(f"Detailed log saved to file: {filepath}")
+
+# Flagged transformers from the last scanned state summary, shared by the reports and the alert
+_flagged_cache = {'details': None, 'flagged': ()}
+
+def _flagged_transformers(state_details: dict) -> tuple:
+    """
+    Returns (bus, transformer) pairs for every transformer whose status isn't 'OK'. The reports and the
+    alert each need a subset of these, so the bus list is scanned once per state summary.
+    """
+    cache = _flagged_cache
+    if cache['details'] is not state_details:
+        cache['flagged'] = tuple(
+            (bus, xfmr)
+            for bus in state_details.get('bus_details', [])
+            for xfmr in bus.get('Transformers', ())
+            if xfmr and xfmr.get('status') != 'OK'
+        )
+        cache['details'] = state_details
+    return cache['flagged']
+
+def _iter_state_report_lines(state_details: dict):
+    """Yields the lines of the detailed state report after the header, one at a time."""
     # --- Helper function for formatting summary sections ---
     def format_section(title, content_dict):
-        lines = [f"\n{'='*25} {title.upper()} {'='*25}"]
+        lines = [f"\n{_SECTION_RULE} {title.upper()} {_SECTION_RULE}"]
         max_key_len = max(len(k) for k in content_dict.keys()) if content_dict else 0
         for key, value in content_dict.items():
             lines.append(f"{key:<{max_key_len}} : {value}")
         return lines
 
-    # 1. Header
-    output.append(f"GRID SIMULATION STATE REPORT")
-    output.append(f"Generated on: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-
-    # 2. Critical Transformers Section
-    output.append(f"\n{'='*25} CRITICAL & WARNING TRANSFORMERS {'='*25}")
-    critical_transformers_found = []
-    for bus in state_details.get('bus_details', []):
-        for xfmr in bus.get('Transformers', []):
-            if xfmr and xfmr.get('status') in ["Critical", "Warning", "Overloaded"]:
-                critical_transformers_found.append(
-                    f"  - Transformer '{xfmr['name']}' on Bus '{bus['Bus']}': "
-                    f"Status: {xfmr['status']}, Loading: {xfmr['loading_percent']:.2f}% ({xfmr['current_kVA']:.2f}/{xfmr['rated_kVA']:.2f} kVA)"
-                )
+    # 1. Critical Transformers Section
+    yield f"\n{_SECTION_RULE} CRITICAL & WARNING TRANSFORMERS {_SECTION_RULE}"
+    critical_transformers_found = [
+        _CRITICAL_LINE_FMT(xfmr['name'], bus['Bus'], xfmr['status'],
+                           xfmr['loading_percent'], xfmr['current_kVA'], xfmr['rated_kVA'])
+        for bus, xfmr in _flagged_transformers(state_details)
+        if xfmr.get('status') in _ALERT_STATUSES
+    ]
     if critical_transformers_found:
-        output.extend(sorted(critical_transformers_found))
+        yield from sorted(critical_transformers_found)
     else:
-        output.append("  - All transformer loading levels are normal.")
+        yield "  - All transformer loading levels are normal."
 
-    # 3. Power and Voltage Summaries
-    output.extend(format_section("Power Summary", state_details.get('power_summary', {})))
-    output.extend(format_section("Voltage Profile", state_details.get('voltage_profile', {})))
+    # 2. Power and Voltage Summaries
+    yield from format_section("Power Summary", state_details.get('power_summary', {}))
+    yield from format_section("Voltage Profile", state_details.get('voltage_profile', {}))
 
-    # 4. Detailed Neighborhood Breakdown
-    output.append(f"\n\n{'='*25} DETAILED NEIGHBORHOOD & NODE BREAKDOWN {'='*25}")
+    # 3. Detailed Neighborhood Breakdown
+    yield f"\n\n{_SECTION_RULE} DETAILED NEIGHBORHOOD & NODE BREAKDOWN {_SECTION_RULE}"
     
     neighborhoods = state_details.get('neighborhood_details', {})
     bus_details_list = state_details.get('bus_details', [])
@@ -92,13 +254,13 @@ def save_state_to_file(state_details: dict, filename: str, results_dir: str):
     dfp_registry = state_details.get('dfp_registry', [])
 
     if not neighborhoods or not bus_map:
-        output.append("  - No neighborhood or bus data available.")
+        yield "  - No neighborhood or bus data available."
     else:
         for hood_id, bus_names in sorted(neighborhoods.items()):
-            output.append(f"\n{'-'*20} Neighborhood: {hood_id} {'-'*20}")
+            yield f"\n{_HOOD_RULE} Neighborhood: {hood_id} {_HOOD_RULE}"
             
             table_data = []
-            headers = ["Bus", "VMag (pu)", "Load (kW)", "Gen (kW)", "Net (kW)", "Subscribed DFPs", "Components"]
+            headers = _STATE_TABLE_HEADERS
 
             for bus_name in sorted(bus_names):
                 bus = bus_map.get(bus_name.lower())
@@ -113,59 +275,69 @@ def save_state_to_file(state_details: dict, filename: str, results_dir: str):
                 comp_parts = []
                 if bus.get('Transformers'):
                     for xfmr in bus['Transformers']:
-                        comp_parts.append(f"XFMR:'{xfmr['name']}'({xfmr['status']},{xfmr['loading_percent']:.1f}%)")
+                        comp_parts.append(_XFMR_PART_FMT(xfmr['name'], xfmr['status'], xfmr['loading_percent']))
                 if bus.get('Devices'):
                     for device in bus['Devices']:
-                        comp_parts.append(f"DEV:'{device['device_name']}'({device['kw']:.1f}kW)")
+                        comp_parts.append(_DEV_PART_FMT(device['device_name'], device['kw']))
                 if bus.get('StorageDevices'):
                     for storage in bus['StorageDevices']:
                         energy_percent = (storage['current_energy_kwh'] / storage['max_capacity_kwh'] * 100) if storage['max_capacity_kwh'] > 0 else 0
-                        comp_parts.append(f"STOR:'{storage['device_name']}'({storage['mode']},{energy_percent:.1f}%)")
+                        comp_parts.append(_STOR_PART_FMT(storage['device_name'], storage['mode'], energy_percent))
                 comp_str = " | ".join(comp_parts) if comp_parts else "None"
 
                 table_data.append([
-                    bus['Bus'], f"{bus['VMag_pu']:.4f}", f"{bus['Load_kW']:.2f}",
-                    f"{bus['Gen_kW']:.2f}", f"{bus['Net_Power_kW']:.2f}", dfp_str, comp_str
+                    bus['Bus'], _VMAG_FMT(bus['VMag_pu']), _KW_FMT(bus['Load_kW']),
+                    _KW_FMT(bus['Gen_kW']), _KW_FMT(bus['Net_Power_kW']), dfp_str, comp_str
                 ])
 
             if not table_data:
-                output.append("  No bus data to display for this neighborhood.")
+                yield "  No bus data to display for this neighborhood."
                 continue
 
             # Dynamically calculate column widths based on content
-            col_widths = [len(h) for h in headers]
-            for row in table_data:
-                for i, cell in enumerate(row):
-                    col_widths[i] = max(col_widths[i], len(cell))
+            col_widths = [max(len(h), *map(len, column)) for h, column in zip(headers, zip(*table_data))]
             
-            # Create and add the formatted table to the output
-            header_line = " | ".join([f"{h:<{w}}" for h, w in zip(headers, col_widths)])
+            # Build the row template once per table and format every row with it
+            row_format = "| " + " | ".join(f"{{:<{w}}}" for w in col_widths) + " |"
             separator = "+-" + "-+-".join(["-"*w for w in col_widths]) + "-+"
             
-            output.append(separator)
-            output.append(f"| {header_line} |")
-            output.append(separator)
-            
-            for row in table_data:
-                row_line = " | ".join([f"{cell:<{w}}" for cell, w in zip(row, col_widths)])
-                output.append(f"| {row_line} |")
-            output.append(separator)
+            yield separator
+            yield row_format.format(*headers)
+            yield separator
+            yield from (row_format.format(*row) for row in table_data)
+            yield separator
 
-    # 5. Write the entire report to the file
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write("\n".join(output))
+def save_state_to_file(state_details: dict, filename: str, results_dir: str, timestamp: str = None):
+    """
+    Formats and saves the current detailed state summary to a text file.
+    'timestamp' lets callers stamp several reports from the same run identically.
+    """
+    filepath = _report_path(results_dir, filename)
+    body = "\n".join(_iter_state_report_lines(state_details))
+    # The header timestamp changes every run, so only the body decides whether the report changed
+    digest = _report_digest(body)
+    if _report_unchanged(filepath, digest):
+        logger.info(f"Detailed simulation state report unchanged, not rewritten: {filepath}")
+        return
 
-    print(f"Detailed simulation state report saved to: {filepath}")
+    header = f"GRID SIMULATION STATE REPORT\nGenerated on: {timestamp or time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+    _queue_report_write(filepath, header + body, digest)
+    logger.info(f"Detailed simulation state report saved to: {filepath}")
 
-def save_critical_transformers_report(state_details: dict, filename: str, results_dir: str):
-    """Saves a dedicated report of transformers in a 'Warning', 'Critical', or 'Overloaded' state."""
-    filepath = os.path.join(results_dir, filename)
-    output = []
+def _format_critical_transformer(hood_id, bus: dict, xfmr: dict) -> str:
+    return (
+        f"\n- Neighborhood: {hood_id}\n"
+        f"  Bus: {bus.get('Bus', 'N/A')}\n"
+        f"  Transformer: {xfmr.get('name', 'N/A')}\n"
+        f"  Status: {xfmr.get('status', 'N/A')}\n"
+        f"  Rated Capacity: {xfmr.get('rated_kVA', 0):.2f} kVA\n"
+        f"  Current Load: {xfmr.get('current_kVA', 0):.2f} kVA\n"
+        f"  Percent of Capacity: {xfmr.get('loading_percent', 0):.2f} %"
+    )
 
-    # Report Header
-    output.append(f"CRITICAL & WARNING TRANSFORMER REPORT")
-    output.append(f"Generated on: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-    output.append("="*55)
+def save_critical_transformers_report(state_details: dict, filename: str, results_dir: str, timestamp: str = None):
+    """Saves a dedicated report of transformers in a 'Warning', 'Critical', or 'Overloaded' state."""
+    filepath = _report_path(results_dir, filename)
 
     # Create a reverse map to easily find a bus's neighborhood ID
     neighborhoods = state_details.get('neighborhood_details', {})
@@ -175,81 +347,103 @@ def save_critical_transformers_report(state_details: dict, filename: str, result
         for bus_name in bus_list
     }
 
-    critical_list = []
-    # Iterate through all buses to find and format relevant transformers
-    for bus in state_details.get('bus_details', []):
-        bus_name_lower = bus.get('Bus', '').lower()
-        for xfmr in bus.get('Transformers', []):
-            if xfmr and xfmr.get('status') in ["Critical", "Warning", "Overloaded"]:
-                hood_id = bus_to_hood_map.get(bus_name_lower, "N/A")
-                details = (
-                    f"\n- Neighborhood: {hood_id}\n"
-                    f"  Bus: {bus.get('Bus', 'N/A')}\n"
-                    f"  Transformer: {xfmr.get('name', 'N/A')}\n"
-                    f"  Status: {xfmr.get('status', 'N/A')}\n"
-                    f"  Rated Capacity: {xfmr.get('rated_kVA', 0):.2f} kVA\n"
-                    f"  Current Load: {xfmr.get('current_kVA', 0):.2f} kVA\n"
-                    f"  Percent of Capacity: {xfmr.get('loading_percent', 0):.2f} %"
-                )
-                critical_list.append(details)
-
-    if critical_list:
-        output.extend(critical_list)
-    else:
-        output.append("\nNo transformers are in a critical or warning state.")
+    # Format every relevant transformer across all buses
+    critical_list = [
+        _format_critical_transformer(bus_to_hood_map.get(bus.get('Bus', '').lower(), "N/A"), bus, xfmr)
+        for bus, xfmr in _flagged_transformers(state_details)
+        if xfmr.get('status') in _ALERT_STATUSES
+    ]
+
+    body = "\n".join([_CRITICAL_REPORT_RULE, *(critical_list or ["\nNo transformers are in a critical or warning state."])])
+    # As with the state report, only the body (not the timestamp) decides whether the report changed
+    digest = _report_digest(body)
+    if _report_unchanged(filepath, digest):
+        logger.info(f"Critical transformers report unchanged, not rewritten: {filepath}")
+        return
 
-    # Write the formatted report to the file
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write("\n".join(output))
+    header = f"CRITICAL & WARNING TRANSFORMER REPORT\nGenerated on: {timestamp or time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+    # Queue the formatted report for writing
+    _queue_report_write(filepath, header + body, digest)
 
-    print(f"Critical transformers report saved to: {filepath}")
+    logger.info(f"Critical transformers report saved to: {filepath}")
     
 def save_dfp_registry_to_file(circuit, filename: str, results_dir: str):
-    filepath = os.path.join(results_dir, filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(f"{'='*120}\nDEMAND FLEXIBILITY PROGRAM (DFP) REGISTRY\n{'='*120}\n")
-        if circuit.dfps:
-            header = f"{'Index':<10}{'Name':<30}{'Description':<50}{'Min Power (kW)':<20}{'Target PF':<15}{'Registered At':<25}"
-            f.write(header + "\n" + "-" * len(header) + "\n")
-            for dfp in circuit.dfps:
-                f.write(f"{dfp.get('index', ''):<10}{dfp.get('name', ''):<30}{dfp.get('description', ''):<50}{dfp.get('min_power_kw', 0):<20.2f}{dfp.get('target_pf', 0):<15.2f}{dfp.get('registered_at', ''):<25}\n")
-        else:
-            f.write("- No DFPs are currently registered.")
-    print(f"DFP registry saved to file: {filepath}")
+    filepath = _report_path(results_dir, filename)
+    if circuit.dfps:
+        rows = "".join(
+            _DFP_ROW_FMT(dfp.get('index', ''), dfp.get('name', ''), dfp.get('description', ''),
+                         dfp.get('min_power_kw', 0), dfp.get('target_pf', 0), dfp.get('registered_at', ''))
+            for dfp in circuit.dfps
+        )
+        body = _DFP_HEADER + "\n" + _DFP_DIVIDER + "\n" + rows
+    else:
+        body = "- No DFPs are currently registered."
+    digest = _report_digest(body)
+    if _report_unchanged(filepath, digest):
+        logger.info(f"DFP registry unchanged, not rewritten: {filepath}")
+        return
+    _queue_report_write(filepath, _DFP_REGISTRY_TITLE + body, digest)
+    logger.info(f"DFP registry saved to file: {filepath}")
+
+# DFP activity logs stay open for appending instead of being reopened for every entry.
+# Entries collect in each handle's buffer and a background thread flushes them once a second,
+# so a burst of events costs one write while the file on disk is never more than a second behind.
+_dfp_log_handles = {}
+_dfp_log_lock = threading.Lock()
+_DFP_LOG_FLUSH_INTERVAL = 1.0
+
+def _flush_dfp_logs_periodically():
+    while True:
+        time.sleep(_DFP_LOG_FLUSH_INTERVAL)
+        with _dfp_log_lock:
+            for handle in _dfp_log_handles.values():
+                handle.flush()
+
+threading.Thread(target=_flush_dfp_logs_periodically, name="dfp-log-flusher", daemon=True).start()
+
+def _close_dfp_logs():
+    with _dfp_log_lock:
+        for handle in _dfp_log_handles.values():
+            handle.close()
+        _dfp_log_handles.clear()
+
+atexit.register(_close_dfp_logs)
 
 def log_dfp_activity(message: str, results_dir: str):
-    filepath = os.path.join(results_dir, "dfps_logs.txt")
+    filepath = _report_path(results_dir, DFP_LOG_FILE)
     timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-    with open(filepath, 'a', encoding='utf-8') as f:
-        f.write(f"[{timestamp}] {message}\n")
-    print(f"DFP activity logged: {message}")
+    with _dfp_log_lock:
+        handle = _dfp_log_handles.get(filepath)
+        if handle is None:
+            handle = _dfp_log_handles[filepath] = open(filepath, 'a', encoding='utf-8', buffering=8192)
+        handle.write(f"[{timestamp}] {message}\n")
 
 def check_and_report_critical_transformers(state_details: dict, results_dir: str, critical_api_endpoint: str):
     """
     Checks for transformers with a status other than 'OK' and sends their details to a specified API endpoint.
     """
-    bus_list = state_details.get('bus_details', [])
-    if not bus_list:
-        return
-
-    # Collect all transformers whose status is not "OK"
-    non_ok_transformers = []
-    for bus_info in bus_list:
-        for transformer in bus_info.get('Transformers', []):
-            if transformer and transformer.get('status') != 'OK':
-                # Add the bus name to the transformer's details for context
-                report_details = transformer.copy()
-                report_details['bus'] = bus_info.get('Bus')
-                non_ok_transformers.append(report_details)
+    # Collect all transformers whose status is not "OK", with the bus name added for context
+    non_ok_transformers = [
+        {**transformer, 'bus': bus_info.get('Bus')}
+        for bus_info, transformer in _flagged_transformers(state_details)
+    ]
 
     # If there are any non-OK transformers, send the alert
     if not non_ok_transformers:
         return
 
+    # The payload is the list of all transformers that are not in an "OK" state
+    with _pending_alerts_lock:
+        if critical_api_endpoint not in _pending_alerts:
+            _alert_pool.submit(_send_critical_alert, critical_api_endpoint)
+        _pending_alerts[critical_api_endpoint] = non_ok_transformers
+
+def _send_critical_alert(critical_api_endpoint: str):
+    with _pending_alerts_lock:
+        non_ok_transformers = _pending_alerts.pop(critical_api_endpoint)
     try:
-        # The payload is the list of all transformers that are not in an "OK" state
-        response = requests.post(critical_api_endpoint, json=non_ok_transformers, timeout=5)
+        response = _alert_session.post(critical_api_endpoint, json=non_ok_transformers, timeout=5)
         response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-        print(f"Successfully sent details of {len(non_ok_transformers)} non-OK transformers to {critical_api_endpoint}.")
+        logger.info(f"Successfully sent details of {len(non_ok_transformers)} non-OK transformers to {critical_api_endpoint}.")
     except requests.exceptions.RequestException as e:
-        print(f"Error sending critical transformer alert to {critical_api_endpoint}: {e}")
+        logger.error(f"Error sending critical transformer alert to {critical_api_endpoint}: {e}")
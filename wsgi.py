@@ -0,0 +1,3 @@
+# WSGI entry point for production servers: `gunicorn wsgi:app`.
+# Deployment settings live in gunicorn.conf.py; see the README before changing the worker count.
+from run import app